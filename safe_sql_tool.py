@@ -0,0 +1,311 @@
+"""
+Shared Safe SQL Tool (Read-Only SELECT Execution)
+
+This module holds the guarded SQL execution tool used by scripts 03 and 04.
+Keeping a single implementation means both agents enforce exactly the same
+rules, and the validator/connection setup happens once per process.
+
+Security Features Implemented:
+✅ Input validation by parsing SQL into an AST (sqlglot)
+✅ Whitelist approach - only SELECT statements allowed
+✅ Automatic LIMIT injection to prevent large result sets
+✅ SQL injection protection through statement-type checks on the AST
+✅ Multiple statement prevention
+✅ Error handling for SQL execution failures
+✅ Database-enforced read-only connection (PRAGMA query_only)
+
+Usage:
+    from safe_sql_tool import SafeSQLTool, load_schema_context
+    schema_context = load_schema_context()  # table DDL + sample rows for the prompt
+    tool = SafeSQLTool()                    # default LIMIT 200
+    tool = SafeSQLTool(row_limit=50)        # tighter bound for this instance
+"""
+
+import os  # File timestamps for the schema cache
+import re  # Leading-comment stripping before the keyword check
+import sqlite3  # Direct SQLite connection for query execution
+import threading  # Lock guarding the shared connection
+from functools import lru_cache  # Memoization of validation and query results
+import orjson  # Fast JSON serialization in C
+from typing import Callable, Type  # Type hinting for better code documentation
+import sqlglot  # SQL parser used to validate statements structurally
+from sqlglot import exp  # SQL expression (AST node) types
+from sqlglot.dialects.dialect import Dialect  # SQLite tokenizer/parser pair
+from sqlglot.tokens import TokenType  # Token kinds (used to find the trailing ";")
+from pydantic import BaseModel, Field  # Data validation and serialization
+from langchain.tools import BaseTool  # Base class for creating custom tools
+from langchain_community.utilities import SQLDatabase  # Database schema inspection utilities
+
+# Database Configuration
+# DB_PATH: SQLite database file for local development
+# DB_URL: SQLAlchemy-style connection string used for schema inspection
+DB_PATH = "sql_agent_class.db"
+DB_URL = f"sqlite:///{DB_PATH}"
+
+# Default number of rows injected as LIMIT when a query is unbounded
+DEFAULT_ROW_LIMIT = 200
+
+# Tables exposed to the agents, and the on-disk cache of their schema text
+TABLES = ("customers", "orders", "order_items", "products", "refunds", "payments")
+SCHEMA_CACHE_PATH = os.path.join(os.path.dirname(DB_PATH), ".schema_cache.txt")
+
+# Open a Persistent Read-Only Connection
+# One sqlite3 connection is opened at import time and reused by every tool call,
+# avoiding per-query connection checkout and transaction setup.
+#   - check_same_thread=False: the agent may call the tool from worker threads
+#   - isolation_level=None: autocommit, so no BEGIN/COMMIT around each SELECT
+#   - PRAGMA query_only: SQLite itself refuses any write, backing up the validator
+#   - PRAGMA cache_size: keep up to 128 MiB of B-tree pages in memory
+#   - PRAGMA temp_store: sorts and temp tables for GROUP BY/ORDER BY stay in RAM
+#   - PRAGMA mmap_size: read the database file through a 256 MiB memory map
+# _conn_lock serializes access since a sqlite3 connection is not safe for
+# concurrent use.
+_conn = sqlite3.connect(DB_PATH, check_same_thread=False, isolation_level=None)
+_conn.execute("PRAGMA query_only=ON")
+_conn.execute("PRAGMA cache_size=-131072")
+_conn.execute("PRAGMA temp_store=MEMORY")
+_conn.execute("PRAGMA mmap_size=268435456")
+_conn_lock = threading.Lock()
+
+# JSON fallback for values orjson does not handle (BLOBs become hex text)
+def _json_default(value):
+    return value.hex() if isinstance(value, bytes) else str(value)
+
+# Query Result Cache
+# The connection is read-only, so a given SQL string always returns the same
+# rows within a session. Results are memoized on the validated SQL text so the
+# agent repeating a sub-query skips execution entirely. Rows are built straight
+# from the cursor iterator and serialized by orjson in C, so no Python-level
+# per-row copy is made; the cache stores the finished JSON text, which is what
+# the agent forwards to the LLM anyway. BLOB values, which orjson cannot encode
+# natively, are sent as hex strings (x'1F' -> "1f"); any other unsupported
+# value falls back to str().
+# Call _exec_cached.cache_clear() if the database is modified while running.
+@lru_cache(maxsize=256)
+def _exec_cached(sql: str) -> str:
+    with _conn_lock:
+        cur = _conn.execute(sql)
+        rows = list(cur)
+        cols = [d[0] for d in cur.description or ()]
+    return orjson.dumps({"columns": cols, "rows": rows}, default=_json_default).decode()
+
+# SQL Validation Rules
+# Statements are parsed with sqlglot and checked on the AST, so keywords inside
+# string literals or quoted identifiers (e.g. name = 'DELETE ME') are not flagged
+# _WRITE_NODES: statement types that modify data or schema. Statements must
+# already start with SELECT/WITH, so this only matters for WITH ... INSERT/
+# UPDATE/DELETE, where it gives a clearer error; any other root that is not a
+# query is rejected by the exp.Query check.
+_WRITE_NODES = (exp.Insert, exp.Update, exp.Delete, exp.Drop, exp.Alter, exp.Create)
+
+# sqlglot's SQLite dialect, used to tokenize and parse in one pass
+_SQLITE = Dialect.get_or_raise("sqlite")
+
+# Statements must start with one of these keywords (checked as a plain prefix)
+_LEADING_KEYWORDS = ("SELECT", "WITH")
+
+# Whitespace and -- / /* */ comments in front of the first keyword. Comments
+# later in the statement are left to the parser, which already ignores them
+# and knows not to treat '--' inside a string literal as a comment.
+# Any regular expression in the validator must run in linear time on
+# adversarial input. This one cannot backtrack: it is used with match() and
+# nothing after the group can fail, and each alternative starts with a
+# different character. Avoid nested or adjacent unbounded quantifiers over
+# overlapping characters (e.g. (a+)+ or .*.*). Atomic groups (?>...) and
+# possessive quantifiers (*+, ++) need Python 3.11 and must not be used while
+# older Pythons are supported.
+_LEADING_COMMENTS_RE = re.compile(r"(?:\s+|--[^\n]*|/\*.*?\*/)*", re.S)
+
+def _is_bounded(tree: exp.Query) -> bool:
+    """
+    Tell whether the outer query already bounds its result size.
+
+    The check runs on the parsed tree, so LIMIT, GROUP BY or an aggregate name
+    appearing inside a string literal (e.g. note = 'LIMIT 5 reached') does not
+    count. Only the outermost query matters: a LIMIT or COUNT() inside a
+    subquery, or an aggregate used as a window function (SUM(...) OVER (...)),
+    does not reduce the number of rows returned.
+
+    Args:
+        tree (exp.Query): Parsed statement
+
+    Returns:
+        bool: True if the query has a LIMIT, a GROUP BY, or a plain aggregate
+        in its SELECT list
+    """
+    if tree.args.get("limit") is not None:
+        return True
+
+    if not isinstance(tree, exp.Select):
+        return False
+
+    if tree.args.get("group"):
+        return True
+
+    return any(
+        agg.find_ancestor(exp.Window, exp.Select) is tree
+        for projection in tree.expressions
+        for agg in projection.find_all(exp.AggFunc)
+    )
+
+# Validator Factory
+# Builds a sanitizer with the row limit bound in its closure. The returned
+# function validates a raw SQL string and prepares it for execution (LIMIT
+# injection), returning (True, prepared_sql) or (False, error_message).
+# Both levels are memoized: one validator exists per limit value, and each
+# validator caches its results by input text, so a repeated query skips the
+# prefix check, parse and LIMIT rewrite.
+@lru_cache(maxsize=None)
+def _make_validator(limit: int = DEFAULT_ROW_LIMIT) -> Callable[[str], tuple[bool, str]]:
+    @lru_cache(maxsize=512)
+    def validate(sql: str) -> tuple[bool, str]:
+        s = sql.strip().rstrip(";")
+        s = s[_LEADING_COMMENTS_RE.match(s).end():]
+
+        # Leading-keyword fast path: anything not starting with SELECT/WITH is
+        # rejected before the parser runs. Only the 6-character head is case
+        # folded, then compared case-sensitively; the SQL itself keeps its case
+        # since identifiers and string literals must reach SQLite unchanged.
+        if not s[:6].upper().startswith(_LEADING_KEYWORDS):
+            return False, "ERROR: only SELECT statements are allowed."
+
+        try:
+            tokens = _SQLITE.tokenize(s)
+            statements = _SQLITE.parser().parse(tokens, s)
+        except sqlglot.errors.SqlglotError as e:
+            return False, f"ERROR: could not parse SQL: {e}"
+
+        # A trailing comment after the final ";" parses as an empty statement
+        statements = [st for st in statements if st is not None and not isinstance(st, exp.Semicolon)]
+        if len(statements) != 1:
+            return False, "ERROR: multiple statements are not allowed."
+
+        # A SELECT root cannot contain DML in SQLite, so only the root needs
+        # checking; WITH ... INSERT/UPDATE/DELETE is caught here
+        tree = statements[0]
+        if isinstance(tree, _WRITE_NODES):
+            return False, "ERROR: write operations are not allowed."
+
+        if not isinstance(tree, exp.Query):
+            return False, "ERROR: only SELECT statements are allowed."
+
+        # The LIMIT is appended to the model's own text rather than to SQL
+        # regenerated from the tree: regeneration rewrites literals (0x1F
+        # becomes a BLOB) and function names, which changes values and column
+        # labels. The text is first cut after its last real token, dropping a
+        # trailing ";" and any comment tail, and the LIMIT goes on a new line
+        # so a "--" comment cannot swallow it. A query with OFFSET but no LIMIT
+        # cannot be extended this way and is regenerated instead.
+        # No ORDER BY is added for unordered queries: sorting would make SQLite
+        # materialize and sort the full result before applying the LIMIT,
+        # instead of stopping after the first `limit` rows.
+        if not _is_bounded(tree):
+            if tree.args.get("offset") is None:
+                last = next(t for t in reversed(tokens) if t.token_type != TokenType.SEMICOLON)
+                s = f"{s[:last.end + 1]}\nLIMIT {limit}"
+            else:
+                tree.set("limit", exp.Limit(expression=exp.Literal.number(limit)))
+                s = tree.sql(dialect="sqlite")
+
+        return True, s
+
+    return validate
+
+def load_schema_context(tables: tuple[str, ...] = TABLES) -> str:
+    """
+    Return the schema description used in the agents' system prompts.
+
+    SQLDatabase.get_table_info() introspects every table and samples rows on
+    each call, although the schema only changes when the database is rebuilt.
+    The text is therefore cached in SCHEMA_CACHE_PATH and reused as long as the
+    cache file is newer than the database file and was built for the same tables.
+    If the cache cannot be written (e.g. a read-only working directory), the
+    freshly built text is still returned.
+
+    Args:
+        tables (tuple[str, ...]): Tables to describe
+
+    Returns:
+        str: Schema text as produced by SQLDatabase.get_table_info()
+    """
+    header = "-- tables: " + ",".join(tables) + "\n"
+    if os.path.exists(SCHEMA_CACHE_PATH) and os.path.getmtime(SCHEMA_CACHE_PATH) > os.path.getmtime(DB_PATH):
+        with open(SCHEMA_CACHE_PATH, "r") as f:
+            cached = f.read()
+        if cached.startswith(header):
+            return cached[len(header):]
+
+    schema_context = SQLDatabase.from_uri(DB_URL, include_tables=list(tables)).get_table_info()
+    try:
+        with open(SCHEMA_CACHE_PATH, "w") as f:
+            f.write(header + schema_context)
+    except OSError:
+        pass
+    return schema_context
+
+class QueryInput(BaseModel):
+    """
+    Pydantic model for safe SQL query input validation.
+
+    This model defines the expected input structure for the safe SQL execution tool.
+    It includes clear documentation about what types of queries are allowed.
+
+    Attributes:
+        sql (str): A single read-only SELECT statement with automatic LIMIT bounds
+    """
+    sql: str = Field(description="A single read-only SELECT statement, bounded with LIMIT when returning many rows.")
+
+class SafeSQLTool(BaseTool):
+    """
+    SECURE SQL Tool - Only Allows Read-Only SELECT Operations
+
+    This tool implements multiple layers of security to prevent dangerous SQL operations.
+    It serves as a safe alternative to unrestricted SQL execution tools, and supports
+    the complex JOINs, aggregations, window functions and CTEs used for analytics.
+
+    Security Layers:
+    1. AST-based validation using sqlglot
+    2. Whitelist approach (only SELECT allowed)
+    3. Automatic LIMIT injection for result set control
+    4. Leading-keyword check and write-operation detection on the parsed statement
+    5. Multi-statement prevention
+    6. Comprehensive error handling
+
+    Attributes:
+        name (str): Tool identifier for agent tool selection
+        description (str): Clear description of tool capabilities and restrictions
+        args_schema (Type[BaseModel]): Pydantic model for input validation
+        row_limit (int): LIMIT injected into unbounded queries
+    """
+
+    # Tool Configuration
+    name: str = "execute_sql"
+    description: str = "Execute exactly one SELECT statement; DML/DDL is forbidden."
+    args_schema: Type[BaseModel] = QueryInput
+    row_limit: int = DEFAULT_ROW_LIMIT
+
+    def _run(self, sql: str) -> str:
+        """
+        Execute SQL with comprehensive security validation.
+
+        This method implements multiple security checks before executing any SQL.
+        It follows a security-first approach with validation at every step.
+
+        Args:
+            sql (str): The SQL statement to validate and execute
+
+        Returns:
+            str: For successful SELECT queries - JSON text {"columns": [...], "rows": [[...], ...]}
+            str: For validation errors or SQL execution errors - "ERROR: ..."
+        """
+        ok, payload = _make_validator(self.row_limit)(sql)
+        if not ok:
+            return payload
+
+        try:
+            return _exec_cached(payload)
+        except Exception as e:
+            return f"ERROR: {e}"
+
+    def _arun(self, *args, **kwargs):
+        raise NotImplementedError